@@ -15,17 +15,34 @@ Environment variables:
   JOBSPY_SITES=indeed,linkedin,glassdoor,zip_recruiter,google - Sites to scrape
 """
 
+import asyncio
+import functools
+import heapq
+import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Optional
 
+import ahocorasick
+import ijson
 import requests
 import yaml
+from cachetools import TTLCache
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from jobspy import scrape_jobs
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Prefer the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 
 # Default configuration
@@ -41,6 +58,59 @@ DEFAULTS = {
     "usajobs_email": None,
 }
 
+# Max locations scraped concurrently in /search-all; higher values risk
+# rate limiting from the job boards.
+MAX_CONCURRENT_SCRAPES = 5
+
+# Worker threads for blocking JobSpy/USAJOBS calls, sized separately from
+# asyncio's default executor so fan-out doesn't compete with other threads
+SCRAPE_WORKERS = 16
+
+# How long identical searches reuse scraped results, in seconds
+SCRAPE_CACHE_TTL = 600
+
+
+def read_config_file(config_path: Path) -> dict:
+    """Parse the YAML config, reusing a JSON sidecar cache when it is fresh.
+
+    The cache (e.g. config.yaml.cache.json) records the YAML file's exact
+    mtime and size, and is only used when both still match. Any edit or
+    replacement of config.yaml, even with an older mtime, forces a re-parse.
+    """
+    cache_path = config_path.with_name(f"{config_path.name}.cache.json")
+    config_stat = config_path.stat()
+    source = {"mtime_ns": config_stat.st_mtime_ns, "size": config_stat.st_size}
+    if cache_path.exists():
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if cached.get("source") == source:
+                return cached["config"]
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass  # Unreadable or old-format cache - fall back to YAML
+
+    with open(config_path) as f:
+        file_config = yaml.load(f, Loader=_YamlLoader) or {}
+
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cached = json.dumps({"source": source, "config": file_config})
+        # The cache holds the same secrets as the config, so give it the same mode
+        mode = config_stat.st_mode & 0o777
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with os.fdopen(fd, "w") as f:
+            f.write(cached)
+        os.chmod(tmp_path, mode)  # os.open's mode is masked by the umask
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError):
+        # Read-only directory or non-JSON values - skip caching
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+    return file_config
+
 
 def load_config() -> dict:
     """Load configuration from YAML file, env vars, or defaults."""
@@ -50,41 +120,40 @@ def load_config() -> dict:
     config_path = Path(os.environ.get("CONFIG_PATH", "config.yaml"))
     if config_path.exists():
         try:
-            with open(config_path) as f:
-                file_config = yaml.safe_load(f) or {}
-                settings = file_config.get("settings", {})
-
-                if "sites" in settings:
-                    config["sites"] = settings["sites"]
-                if "hours_old" in settings:
-                    config["hours_old"] = settings["hours_old"]
-                if "results_wanted" in settings:
-                    config["results_wanted"] = settings["results_wanted"]
-                if "country_indeed" in settings:
-                    config["country_indeed"] = settings["country_indeed"]
-                if "linkedin_fetch_description" in settings:
-                    config["linkedin_fetch_description"] = settings["linkedin_fetch_description"]
-
-                # Store full config for searches, locations, filters
-                config["searches"] = file_config.get("searches", [])
-                config["locations"] = file_config.get("locations", [])
-                config["exclude_keywords"] = file_config.get("exclude_keywords", [])
-                config["include_keywords"] = file_config.get("include_keywords", [])
-
-                # Scoring preferences
-                scoring = file_config.get("scoring", {})
-                if scoring:
-                    config["scoring"] = scoring
-
-                # USAJOBS settings
-                if "usajobs_enabled" in settings:
-                    config["usajobs_enabled"] = settings["usajobs_enabled"]
-                if "usajobs_api_key" in settings:
-                    config["usajobs_api_key"] = settings["usajobs_api_key"]
-                if "usajobs_email" in settings:
-                    config["usajobs_email"] = settings["usajobs_email"]
-
-                print(f"Loaded config from {config_path}")
+            file_config = read_config_file(config_path)
+            settings = file_config.get("settings", {})
+
+            if "sites" in settings:
+                config["sites"] = settings["sites"]
+            if "hours_old" in settings:
+                config["hours_old"] = settings["hours_old"]
+            if "results_wanted" in settings:
+                config["results_wanted"] = settings["results_wanted"]
+            if "country_indeed" in settings:
+                config["country_indeed"] = settings["country_indeed"]
+            if "linkedin_fetch_description" in settings:
+                config["linkedin_fetch_description"] = settings["linkedin_fetch_description"]
+
+            # Store full config for searches, locations, filters
+            config["searches"] = file_config.get("searches", [])
+            config["locations"] = file_config.get("locations", [])
+            config["exclude_keywords"] = file_config.get("exclude_keywords", [])
+            config["include_keywords"] = file_config.get("include_keywords", [])
+
+            # Scoring preferences
+            scoring = file_config.get("scoring", {})
+            if scoring:
+                config["scoring"] = scoring
+
+            # USAJOBS settings
+            if "usajobs_enabled" in settings:
+                config["usajobs_enabled"] = settings["usajobs_enabled"]
+            if "usajobs_api_key" in settings:
+                config["usajobs_api_key"] = settings["usajobs_api_key"]
+            if "usajobs_email" in settings:
+                config["usajobs_email"] = settings["usajobs_email"]
+
+            print(f"Loaded config from {config_path}")
         except Exception as e:
             print(f"Warning: Failed to load {config_path}: {e}")
 
@@ -175,9 +244,50 @@ def scrape_single_location(
         params["location"] = "United States"
 
     jobs_df = scrape_jobs(**params)
+    # Swap NaN for None up front; the object cast stops float columns coercing None back to NaN
+    jobs_df = jobs_df.astype(object).where(jobs_df.notna(), None)
     return jobs_df.to_dict(orient="records")
 
 
+# Shared session so repeated USAJOBS calls reuse pooled keep-alive connections
+_usajobs_session = requests.Session()
+_usajobs_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
+
+def usajobs_search_params(
+    search_term: str,
+    hours_old: int = 72,
+    results_wanted: int = 50,
+    is_remote: bool = False,
+    location: str | None = None,
+    distance: int = 50,
+) -> dict:
+    """Build USAJOBS search API query params."""
+    # Convert hours to days for USAJOBS (max 60 days)
+    days_posted = min(hours_old // 24, 60) or 1
+
+    params = {
+        "Keyword": search_term,
+        "DatePosted": days_posted,
+        "ResultsPerPage": min(results_wanted, 500),  # USAJOBS max is 500
+        "JobCategoryCode": "2210",  # Information Technology Management
+    }
+
+    # Add location filtering
+    # Note: RemoteIndicator=True is very restrictive for federal jobs
+    # Instead, we fetch all and let the results show remote eligibility via _telework/_remote fields
+    if location and not is_remote:
+        params["LocationName"] = location
+        if distance:
+            params["Radius"] = distance
+
+    return params
+
+
 def scrape_usajobs(
     search_term: str,
     hours_old: int = 72,
@@ -197,80 +307,64 @@ def scrape_usajobs(
         print("USAJOBS: Missing API key or email, skipping")
         return []
 
-    # Convert hours to days for USAJOBS (max 60 days)
-    days_posted = min(hours_old // 24, 60) or 1
-
     headers = {
         "Host": "data.usajobs.gov",
         "User-Agent": email,
         "Authorization-Key": api_key,
     }
-
-    params = {
-        "Keyword": search_term,
-        "DatePosted": days_posted,
-        "ResultsPerPage": min(results_wanted, 500),  # USAJOBS max is 500
-        "JobCategoryCode": "2210",  # Information Technology Management
-    }
-
-    # Add location filtering
-    # Note: RemoteIndicator=True is very restrictive for federal jobs
-    # Instead, we fetch all and let the results show remote eligibility via _telework/_remote fields
-    if location and not is_remote:
-        params["LocationName"] = location
-        if distance:
-            params["Radius"] = distance
+    params = usajobs_search_params(search_term, hours_old, results_wanted, is_remote, location, distance)
 
     try:
-        response = requests.get(
+        # Stream the body so large result pages are never held in memory whole
+        with _usajobs_session.get(
             "https://data.usajobs.gov/api/search",
             headers=headers,
             params=params,
             timeout=30,
-        )
-        response.raise_for_status()
-        data = response.json()
-
-        results = data.get("SearchResult", {}).get("SearchResultItems", [])
-        jobs = []
-
-        for item in results:
-            job_data = item.get("MatchedObjectDescriptor", {})
-            position = job_data.get("PositionLocation", [{}])[0] if job_data.get("PositionLocation") else {}
-
-            # Extract salary info
-            salary_info = job_data.get("PositionRemuneration", [{}])[0] if job_data.get("PositionRemuneration") else {}
-            min_salary = salary_info.get("MinimumRange")
-            max_salary = salary_info.get("MaximumRange")
-
-            # Parse dates
-            pub_date = job_data.get("PublicationStartDate", "")
-            try:
-                date_posted = datetime.strptime(pub_date, "%Y-%m-%d") if pub_date else None
-            except ValueError:
-                date_posted = None
-
-            # Build job dict matching JobSpy format
-            job = {
-                "site": "usajobs",
-                "title": job_data.get("PositionTitle", ""),
-                "company": job_data.get("OrganizationName", ""),
-                "location": position.get("LocationName", ""),
-                "job_url": job_data.get("PositionURI", ""),
-                "description": job_data.get("UserArea", {}).get("Details", {}).get("JobSummary", ""),
-                "date_posted": date_posted,
-                "min_amount": float(min_salary) if min_salary else None,
-                "max_amount": float(max_salary) if max_salary else None,
-                "interval": salary_info.get("RateIntervalCode", ""),
-                "job_type": job_data.get("PositionSchedule", [{}])[0].get("Name", "") if job_data.get("PositionSchedule") else "",
-                # USAJOBS-specific fields
-                "_usajobs_id": job_data.get("PositionID", ""),
-                "_department": job_data.get("DepartmentName", ""),
-                "_grade": job_data.get("JobGrade", [{}])[0].get("Code", "") if job_data.get("JobGrade") else "",
-                "_telework": job_data.get("TeleworkEligible", False),
-                "_remote": job_data.get("RemoteIndicator", False),
-            }
-            jobs.append(job)
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True  # Let urllib3 gunzip while streaming
+            results = ijson.items(response.raw, "SearchResult.SearchResultItems.item", use_float=True)
+            jobs = []
+
+            for item in results:
+                job_data = item.get("MatchedObjectDescriptor", {})
+                position = job_data.get("PositionLocation", [{}])[0] if job_data.get("PositionLocation") else {}
+
+                # Extract salary info
+                salary_info = job_data.get("PositionRemuneration", [{}])[0] if job_data.get("PositionRemuneration") else {}
+                min_salary = salary_info.get("MinimumRange")
+                max_salary = salary_info.get("MaximumRange")
+
+                # Parse dates
+                pub_date = job_data.get("PublicationStartDate", "")
+                try:
+                    date_posted = datetime.strptime(pub_date, "%Y-%m-%d") if pub_date else None
+                except ValueError:
+                    date_posted = None
+
+                # Build job dict matching JobSpy format
+                job = {
+                    "site": "usajobs",
+                    "title": job_data.get("PositionTitle", ""),
+                    "company": job_data.get("OrganizationName", ""),
+                    "location": position.get("LocationName", ""),
+                    "job_url": job_data.get("PositionURI", ""),
+                    "description": job_data.get("UserArea", {}).get("Details", {}).get("JobSummary", ""),
+                    "date_posted": date_posted,
+                    "min_amount": float(min_salary) if min_salary else None,
+                    "max_amount": float(max_salary) if max_salary else None,
+                    "interval": salary_info.get("RateIntervalCode", ""),
+                    "job_type": job_data.get("PositionSchedule", [{}])[0].get("Name", "") if job_data.get("PositionSchedule") else "",
+                    # USAJOBS-specific fields
+                    "_usajobs_id": job_data.get("PositionID", ""),
+                    "_department": job_data.get("DepartmentName", ""),
+                    "_grade": job_data.get("JobGrade", [{}])[0].get("Code", "") if job_data.get("JobGrade") else "",
+                    "_telework": job_data.get("TeleworkEligible", False),
+                    "_remote": job_data.get("RemoteIndicator", False),
+                }
+                jobs.append(job)
 
         print(f"USAJOBS: Found {len(jobs)} jobs for '{search_term}'")
         return jobs
@@ -283,84 +377,209 @@ def scrape_usajobs(
         return []
 
 
-def filter_jobs(jobs: list[dict], exclude_list: list[str]) -> list[dict]:
-    """Filter out jobs containing excluded keywords in title only."""
-    if not exclude_list:
-        return jobs
-    exclude_lower = [kw.lower() for kw in exclude_list]
-    return [
-        job for job in jobs
-        if not any(
-            exc in str(job.get("title", "")).lower()
-            for exc in exclude_lower
-        )
-    ]
+_scrape_executor = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix="scrape")
 
 
-def score_jobs(jobs: list[dict], include_list: list[str]) -> list[dict]:
-    """Score jobs based on role fit, industry, location, skills, and company size.
+async def run_scraper(scraper: Callable[..., list[dict]], **kwargs) -> list[dict]:
+    """Run a blocking scraper on the dedicated scrape thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_scrape_executor, functools.partial(scraper, **kwargs))
+
+
+# Recent scrape results, and scrapes currently running, used by cached_scrape()
+_scrape_cache: TTLCache = TTLCache(maxsize=128, ttl=SCRAPE_CACHE_TTL)
+_scrape_inflight: dict[tuple, asyncio.Task] = {}
+
+
+def _finish_scrape(key: tuple, task: asyncio.Task) -> None:
+    """Drop a finished scrape from the in-flight table, caching non-empty results."""
+    if _scrape_inflight.get(key) is task:
+        del _scrape_inflight[key]
+    if not task.cancelled() and task.exception() is None and task.result():
+        _scrape_cache[key] = task.result()
+
+
+async def cached_scrape(scraper: Callable[..., list[dict]], **kwargs) -> list[dict]:
+    """Run a blocking scraper via run_scraper(), caching non-empty results.
+
+    Concurrent calls with the same arguments await one shared upstream
+    request and all get its outcome, including empty results or errors.
+    Searches for jobs under 2 hours old always bypass the cache. Callers get
+    copies of the job dicts since later stages annotate them in place.
+    """
+    if kwargs["hours_old"] < 2:
+        return await run_scraper(scraper, **kwargs)
+
+    key = (
+        scraper.__name__,
+        tuple(CONFIG["sites"]),
+        kwargs["search_term"],
+        kwargs["location"],
+        kwargs["is_remote"],
+        kwargs["distance"],
+        kwargs["hours_old"],
+        kwargs["results_wanted"],
+    )
+    jobs = _scrape_cache.get(key)
+    if jobs is None:
+        task = _scrape_inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(run_scraper(scraper, **kwargs))
+            _scrape_inflight[key] = task
+            task.add_done_callback(functools.partial(_finish_scrape, key))
+        # Shield so one cancelled caller doesn't cancel the scrape for the others
+        jobs = await asyncio.shield(task)
+
+    return [dict(job) for job in jobs]
+
+
+# Default scoring keywords, used for any list not set under 'scoring:' in config.yaml.
+# Preferred titles have no default — add your target roles there.
+
+# Role keywords - prefer people manager roles
+DEFAULT_MGMT_TITLES = frozenset({
+    "manager", "director", "head of", "vp ", "vice president",
+})
+DEFAULT_SENIOR_IC_TITLES = frozenset({
+    "senior", "sr.", "sr ", "lead", "principal", "staff",
+})
+
+# Titles that disqualify even if they have "manager" or infra terms
+DEFAULT_BAD_TITLES = frozenset({
+    "developer", "software engineer", "product manager", "project manager",
+    "data engineer", "machine learning", "ml ", "ai ", "analytics",
+    "financial system", "business system", "hris", "erp", "salesforce",
+    "mainframe", "z/os", "as/400", "cobol",
+    "expense", "budget", "accounting", "credit", "risk analyst",
+    "marketing", "sales engineer", "solutions architect", "pre-sales",
+    "recruiting", "talent", "hr ", "human resource",
+})
+
+# Target locations
+DEFAULT_GOOD_LOCATIONS = frozenset({"remote"})
+
+# Skills to boost
+DEFAULT_GOOD_SKILLS = frozenset({
+    "terraform", "ansible", "kubernetes", "docker", "aws", "azure", "gcp",
+})
+
+# Red flags
+DEFAULT_RED_FLAGS = frozenset({
+    "contract to hire", "c2h",
+})
+
+# Large companies to deprioritize
+DEFAULT_LARGE_COMPANIES = frozenset({
+    "amazon", "aws", "google", "microsoft", "meta", "facebook", "apple", "netflix",
+    "nvidia", "oracle", "ibm", "cisco", "intel", "salesforce", "adobe",
+    "accenture", "deloitte", "kpmg", "pwc", "cognizant", "infosys",
+    "wipro", "tcs", "capgemini", "dxc", "hcl",
+    "robert half", "randstad", "manpower", "kelly services", "adecco",
+    "insight global", "teksystems", "apex systems",
+})
+
+# (scoring config, automaton) built on first use by get_scoring_automaton()
+_scoring_automaton: tuple[dict | None, ahocorasick.Automaton] | None = None
+
+
+def build_scoring_automaton(categories: dict[str, Iterable[str]]) -> ahocorasick.Automaton:
+    """Build one Aho-Corasick automaton over every scoring keyword list.
+
+    Each keyword maps to (keyword, categories), since the same keyword can
+    appear in several lists (e.g. "aws" is both a skill and a large company).
+    """
+    keyword_categories: dict[str, set[str]] = {}
+    for category, keywords in categories.items():
+        for kw in keywords:
+            if kw:
+                keyword_categories.setdefault(kw, set()).add(category)
+
+    automaton = ahocorasick.Automaton()
+    for kw, cats in keyword_categories.items():
+        automaton.add_word(kw, (kw, frozenset(cats)))
+    automaton.make_automaton()
+    return automaton
+
+
+def get_scoring_automaton() -> ahocorasick.Automaton:
+    """Return the scoring automaton, rebuilding it if the scoring config changed.
 
     Scoring preferences are loaded from config.yaml under the 'scoring:' key.
     Falls back to generic defaults if not configured.
     """
-    scoring = CONFIG.get("scoring", {})
-
-    # Role keywords - prefer people manager roles
-    mgmt_titles = scoring.get("mgmt_titles", [
-        "manager", "director", "head of", "vp ", "vice president",
-    ])
-    senior_ic_titles = scoring.get("senior_ic_titles", [
-        "senior", "sr.", "sr ", "lead", "principal", "staff",
-    ])
-
-    # Preferred titles — add your target roles here via config
-    preferred_titles = scoring.get("preferred_titles", [])
-
-    # Titles that disqualify even if they have "manager" or infra terms
-    bad_titles = scoring.get("bad_titles", [
-        "developer", "software engineer", "product manager", "project manager",
-        "data engineer", "machine learning", "ml ", "ai ", "analytics",
-        "financial system", "business system", "hris", "erp", "salesforce",
-        "mainframe", "z/os", "as/400", "cobol",
-        "expense", "budget", "accounting", "credit", "risk analyst",
-        "marketing", "sales engineer", "solutions architect", "pre-sales",
-        "recruiting", "talent", "hr ", "human resource",
-    ])
-
-    # Target locations
-    good_locations = scoring.get("good_locations", ["remote"])
-
-    # Skills to boost
-    good_skills = scoring.get("good_skills", [
-        "terraform", "ansible", "kubernetes", "docker", "aws", "azure", "gcp",
-    ])
-
-    # Red flags
-    red_flags = scoring.get("red_flags", [
-        "contract to hire", "c2h",
-    ])
-
-    # Large companies to deprioritize
-    large_companies = scoring.get("large_companies", [
-        "amazon", "aws", "google", "microsoft", "meta", "facebook", "apple", "netflix",
-        "nvidia", "oracle", "ibm", "cisco", "intel", "salesforce", "adobe",
-        "accenture", "deloitte", "kpmg", "pwc", "cognizant", "infosys",
-        "wipro", "tcs", "capgemini", "dxc", "hcl",
-        "robert half", "randstad", "manpower", "kelly services", "adecco",
-        "insight global", "teksystems", "apex systems",
-    ])
+    global _scoring_automaton
+    config_scoring = CONFIG.get("scoring")
+    if _scoring_automaton is not None and _scoring_automaton[0] is config_scoring:
+        return _scoring_automaton[1]
+
+    scoring = config_scoring or {}
+    categories = {
+        "mgmt": scoring.get("mgmt_titles", DEFAULT_MGMT_TITLES),
+        "senior_ic": scoring.get("senior_ic_titles", DEFAULT_SENIOR_IC_TITLES),
+        "preferred": scoring.get("preferred_titles", ()),
+        "bad": scoring.get("bad_titles", DEFAULT_BAD_TITLES),
+        "good_locations": scoring.get("good_locations", DEFAULT_GOOD_LOCATIONS),
+        "skills": scoring.get("good_skills", DEFAULT_GOOD_SKILLS),
+        "red_flags": scoring.get("red_flags", DEFAULT_RED_FLAGS),
+        "large_companies": scoring.get("large_companies", DEFAULT_LARGE_COMPANIES),
+    }
+
+    automaton = build_scoring_automaton(categories)
+    _scoring_automaton = (config_scoring, automaton)
+    return automaton
+
+
+def score_jobs(jobs: list[dict], include_list: list[str], limit: int) -> list[dict]:
+    """Score jobs and return the top `limit` by score, highest first.
+
+    Scoring is based on role fit, industry, location, skills, and company size.
+
+    All keyword lists are matched in a single Aho-Corasick pass over
+    "title description company"; each hit is attributed to a field by offset.
+    """
+    automaton = get_scoring_automaton()
+    # An automaton with no keywords can't be searched, so match nothing instead
+    find_keywords = automaton.iter if automaton.kind == ahocorasick.AHOCORASICK else lambda text: ()
 
     for job in jobs:
-        title = str(job.get("title", "")).lower()
-        description = str(job.get("description", "")).lower()
-        location = str(job.get("location", "")).lower()
-        company = str(job.get("company", "")).lower()
+        title = job["_title_lc"]
+        description = job["_desc_lc"]
+        location = job["_location_lc"]
+        company = job["_company_lc"]
+
+        # Bad role types sink to the bottom without scoring anything else
+        if any("bad" in categories for _, (_, categories) in find_keywords(title)):
+            job["_score"] = -999
+            continue
+
         text = f"{title} {description} {company}"
         score = 0
 
+        # Field boundaries within text; match end offsets are inclusive
+        title_end = len(title)
+        desc_start = title_end + 1
+        desc_end = desc_start + len(description)
+        company_start = desc_end + 1
+
+        title_categories: set[str] = set()
+        skills_found: set[str] = set()
+        flags_found: set[str] = set()
+        is_large_company = False
+        for end, (kw, categories) in find_keywords(text):
+            start = end - len(kw) + 1
+            if "red_flags" in categories:
+                flags_found.add(kw)
+            if end < title_end:
+                title_categories |= categories
+            elif start >= desc_start and end < desc_end:
+                if "skills" in categories:
+                    skills_found.add(kw)
+            elif start >= company_start and "large_companies" in categories:
+                is_large_company = True
+
         # Role type scoring - prefer managers over IC
-        is_manager = any(kw in title for kw in mgmt_titles)
-        is_senior_ic = any(kw in title for kw in senior_ic_titles) and not is_manager
+        is_manager = "mgmt" in title_categories
+        is_senior_ic = "senior_ic" in title_categories and not is_manager
 
         if is_manager:
             score += 25  # Strong preference for people manager roles
@@ -370,39 +589,29 @@ def score_jobs(jobs: list[dict], include_list: list[str]) -> list[dict]:
             score -= 10  # Junior IC roles not preferred
 
         # Preferred title match (+15)
-        if preferred_titles and any(kw in title for kw in preferred_titles):
+        if "preferred" in title_categories:
             score += 15
 
-        # Bad role types (-20)
-        if any(kw in title for kw in bad_titles):
-            score -= 20
-
         # Location match (+10)
-        if any(loc in location for loc in good_locations):
+        if any("good_locations" in categories for _, (_, categories) in find_keywords(location)):
             score += 10
         if "remote" in location or "remote" in title:
             score += 10
 
         # Skills boost (+5 each)
-        for skill in good_skills:
-            if skill in description:
-                score += 5
+        score += 5 * len(skills_found)
 
         # Red flags (-10 each)
-        for flag in red_flags:
-            if flag in text:
-                score -= 10
+        score -= 10 * len(flags_found)
 
         # Company size heuristic - slight deprioritization for large companies
         # Reduced from -25 to -5 to avoid missing good role/location fits
-        is_large_company = any(lc in company for lc in large_companies)
         if is_large_company:
             score -= 5
             job["_large_company"] = True
 
         # Boost government jobs (typically smaller orgs)
-        site = str(job.get("site", "")).lower()
-        if site == "usajobs":
+        if job.get("site") == "usajobs":
             score += 10  # Government jobs are usually smaller orgs
             job["_govt_job"] = True
 
@@ -410,8 +619,30 @@ def score_jobs(jobs: list[dict], include_list: list[str]) -> list[dict]:
         job["_is_manager"] = is_manager
         job["_is_senior_ic"] = is_senior_ic
 
-    # Sort by score descending
-    return sorted(jobs, key=lambda x: x.get("_score", 0), reverse=True)
+    # Top scores descending; same order as a stable sort, without sorting everything
+    return heapq.nlargest(limit, jobs, key=lambda x: x.get("_score", 0))
+
+
+# Generic locations that are OK for remote searches
+# Be careful with short strings that could match city names
+GENERIC_LOCATIONS = frozenset({
+    "remote", "usa", "united states", "anywhere",
+    "work from home", "wfh", "nationwide",
+})
+
+# State abbreviations to detect specific locations
+STATE_ABBREVS = frozenset({
+    "al", "ak", "az", "ar", "ca", "co", "ct", "de", "fl", "ga",
+    "hi", "id", "il", "in", "ia", "ks", "ky", "la", "me", "md",
+    "ma", "mi", "mn", "ms", "mo", "mt", "ne", "nv", "nh", "nj",
+    "nm", "ny", "nc", "nd", "oh", "ok", "or", "pa", "ri", "sc",
+    "sd", "tn", "tx", "ut", "vt", "va", "wa", "wv", "wi", "wy", "dc",
+})
+
+_GENERIC_LOCATION_RE = re.compile("|".join(re.escape(loc) for loc in sorted(GENERIC_LOCATIONS)))
+_STATES_ALT = "|".join(sorted(STATE_ABBREVS))
+# Matches "Austin, TX", "TX, US" or a trailing "... TX" on lowercased locations
+_STATE_RE = re.compile(rf",\s*(?:{_STATES_ALT})\b|\b(?:{_STATES_ALT})$")
 
 
 def validate_remote_jobs(jobs: list[dict], salary_threshold: int = 150000) -> list[dict]:
@@ -421,25 +652,9 @@ def validate_remote_jobs(jobs: list[dict], salary_threshold: int = 150000) -> li
     - Location is empty, null, or generic (Remote, USA, United States)
     - Salary is above threshold (worth considering relocation)
     """
-    # Generic locations that are OK for remote searches
-    # Be careful with short strings that could match city names
-    generic_locations = [
-        "remote", "usa", "united states", "anywhere",
-        "work from home", "wfh", "nationwide"
-    ]
-
-    # State abbreviations to detect specific locations
-    state_abbrevs = [
-        "al", "ak", "az", "ar", "ca", "co", "ct", "de", "fl", "ga",
-        "hi", "id", "il", "in", "ia", "ks", "ky", "la", "me", "md",
-        "ma", "mi", "mn", "ms", "mo", "mt", "ne", "nv", "nh", "nj",
-        "nm", "ny", "nc", "nd", "oh", "ok", "or", "pa", "ri", "sc",
-        "sd", "tn", "tx", "ut", "vt", "va", "wa", "wv", "wi", "wy", "dc"
-    ]
-
     validated = []
     for job in jobs:
-        location = str(job.get("location") or "").lower().strip()
+        location = job["_location_lc"].strip()
 
         # Empty or null location - keep it
         if not location:
@@ -448,7 +663,7 @@ def validate_remote_jobs(jobs: list[dict], salary_threshold: int = 150000) -> li
             continue
 
         # Generic remote location - keep it
-        if any(gen in location for gen in generic_locations):
+        if _GENERIC_LOCATION_RE.search(location):
             job["_remote_validated"] = True
             validated.append(job)
             continue
@@ -465,10 +680,7 @@ def validate_remote_jobs(jobs: list[dict], salary_threshold: int = 150000) -> li
 
         # Has specific city/state - filter out
         # Check for state abbreviation pattern (e.g., "CA", "NY, US")
-        has_state = any(f", {st}" in f", {location}" or location.endswith(f" {st}")
-                       for st in state_abbrevs)
-
-        if has_state or "," in location:
+        if "," in location or _STATE_RE.search(location):
             # Specific location detected - skip
             continue
 
@@ -479,68 +691,107 @@ def validate_remote_jobs(jobs: list[dict], salary_threshold: int = 150000) -> li
     return validated
 
 
-def clean_job_data(jobs: list[dict]) -> list[dict]:
-    """Clean up NaN values and datetimes for JSON serialization."""
+# Lowercased copies of text fields attached by prepare_jobs(), keyed by source field
+LOWERCASE_FIELDS = {
+    "title": "_title_lc",
+    "description": "_desc_lc",
+    "company": "_company_lc",
+    "location": "_location_lc",
+}
+
+
+def prepare_jobs(jobs: list[dict]) -> list[dict]:
+    """Normalize text fields to strings and attach lowercased copies once.
+
+    Missing title/description/company/location become "" so nothing
+    downstream needs str() guards. Remote validation, keyword filtering,
+    AND-mode matching and scoring all read the _*_lc keys;
+    clean_job_data() strips them before responding.
+    """
     for job in jobs:
-        for key, value in job.items():
-            if isinstance(value, float) and value != value:  # NaN check
-                job[key] = None
-            elif isinstance(value, datetime):
-                job[key] = value.isoformat()
+        for field, lc_key in LOWERCASE_FIELDS.items():
+            value = job.get(field) or ""
+            if type(value) is not str:
+                value = str(value)
+            job[field] = value
+            job[lc_key] = value.lower()
     return jobs
 
 
-def dedupe_jobs(jobs: list[dict]) -> list[dict]:
-    """Deduplicate jobs by job_url, keeping first occurrence."""
-    seen = set()
+def finalize_jobs(jobs: list[dict], exclude_list: list[str]) -> list[dict]:
+    """Dedupe and drop excluded titles in a single pass.
+
+    A job is a duplicate if its job_url or its (title, company, location) was
+    already seen, which also catches one posting listed on several sites.
+    Excluded keywords are matched against the title only.
+    """
+    exclude_re = re.compile("|".join(re.escape(kw.lower()) for kw in exclude_list)) if exclude_list else None
+    seen_urls = set()
+    seen_keys = set()
     unique = []
     for job in jobs:
         url = job.get("job_url")
-        if url and url not in seen:
-            seen.add(url)
-            unique.append(job)
-        elif not url:
-            unique.append(job)  # Keep jobs without URLs
+        title = job["_title_lc"]
+        dedupe_key = (title, job["_company_lc"], job["_location_lc"]) if title else None
+        if (url and url in seen_urls) or (dedupe_key and dedupe_key in seen_keys):
+            continue
+        if url:
+            seen_urls.add(url)
+        if dedupe_key:
+            seen_keys.add(dedupe_key)
+
+        if exclude_re and exclude_re.search(title):
+            continue
+        unique.append(job)
     return unique
 
 
+def clean_job_data(jobs: list[dict]) -> list[dict]:
+    """Strip the internal lowercased fields added by prepare_jobs()."""
+    for job in jobs:
+        for lc_key in LOWERCASE_FIELDS.values():
+            job.pop(lc_key, None)
+    return jobs
+
+
 @app.post("/get-jobs", response_model=JobResponse)
 async def get_jobs(request: JobRequest):
     try:
         hours_old = parse_since_when(request.sinceWhen)
         search_term = " ".join(request.keywords) if request.keywords else "software engineer"
 
-        jobs = scrape_single_location(
-            search_term=search_term,
-            hours_old=hours_old,
-            results_wanted=request.limit,
-            is_remote=request.isRemote or False,
-            location=request.location,
-            distance=request.distance or 50,
-        )
-
-        # Add USAJOBS results if enabled
+        scrape_kwargs = {
+            "search_term": search_term,
+            "hours_old": hours_old,
+            "results_wanted": request.limit,
+            "is_remote": request.isRemote or False,
+            "location": request.location,
+            "distance": request.distance or 50,
+        }
+
+        # Query USAJOBS alongside JobSpy if enabled
+        tasks = [cached_scrape(scrape_single_location, **scrape_kwargs)]
         if CONFIG.get("usajobs_enabled") and CONFIG.get("usajobs_api_key"):
-            try:
-                usajobs = scrape_usajobs(
-                    search_term=search_term,
-                    hours_old=hours_old,
-                    results_wanted=request.limit,
-                    is_remote=request.isRemote or False,
-                    location=request.location,
-                    distance=request.distance or 50,
-                )
+            tasks.append(cached_scrape(scrape_usajobs, **scrape_kwargs))
+
+        jobs, *usajobs_results = await asyncio.gather(*tasks, return_exceptions=True)
+        if isinstance(jobs, BaseException):
+            raise jobs
+        for usajobs in usajobs_results:
+            if isinstance(usajobs, BaseException):
+                print(f"Error searching USAJOBS: {usajobs}")
+            else:
                 jobs.extend(usajobs)
-            except Exception as e:
-                print(f"Error searching USAJOBS: {e}")
+
+        prepare_jobs(jobs)
 
         # Validate remote jobs - filter out non-remote when searching remote
         if request.isRemote:
             jobs = validate_remote_jobs(jobs)
 
-        # Filter out excluded keywords (from request + config)
+        # Dedupe, filter out excluded keywords (from request + config), clean values
         exclude_list = list(request.excludeKeywords or []) + CONFIG.get("exclude_keywords", [])
-        jobs = filter_jobs(jobs, exclude_list)
+        jobs = finalize_jobs(jobs, exclude_list)
 
         # AND mode: require ALL keywords in title or description
         if request.requireAllKeywords and request.keywords:
@@ -548,18 +799,17 @@ async def get_jobs(request: JobRequest):
             jobs = [
                 job for job in jobs
                 if all(
-                    kw in str(job.get("title", "")).lower() or
-                    kw in str(job.get("description", "")).lower()
+                    kw in job["_title_lc"] or kw in job["_desc_lc"]
                     for kw in keywords_lower
                 )
             ]
 
-        # Score and sort by include_keywords
+        # Score and keep the top results
         include_list = CONFIG.get("include_keywords", [])
-        jobs = score_jobs(jobs, include_list)
+        jobs = score_jobs(jobs, include_list, request.limit)
 
         jobs = clean_job_data(jobs)
-        return JobResponse(error=False, jobs=jobs[:request.limit])
+        return JobResponse(error=False, jobs=jobs)
 
     except Exception as e:
         print(f"Error scraping jobs: {e}")
@@ -584,70 +834,89 @@ async def search_all(request: JobRequest):
             if request.location:
                 locations = [{"name": request.location, "location": request.location, "distance": request.distance or 50}]
 
-        all_jobs = []
-        locations_searched = []
+        results_wanted = CONFIG.get("results_wanted", 50)
+        usajobs_enabled = CONFIG.get("usajobs_enabled") and CONFIG.get("usajobs_api_key")
+        sem = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
 
-        for loc in locations:
+        async def _scrape_one(loc: dict) -> list[dict]:
+            """Scrape JobSpy for one location."""
             loc_name = loc.get("name", "unknown")
             is_remote = loc.get("is_remote", False)
-            location = loc.get("location")
-            distance = loc.get("distance", 50)
 
-            print(f"Searching: {search_term} in {loc_name}...")
-            locations_searched.append(loc_name)
-
-            try:
-                jobs = scrape_single_location(
+            async with sem:
+                print(f"Searching: {search_term} in {loc_name}...")
+                jobs = await cached_scrape(
+                    scrape_single_location,
                     search_term=search_term,
                     hours_old=hours_old,
-                    results_wanted=CONFIG.get("results_wanted", 50),
+                    results_wanted=results_wanted,
                     is_remote=is_remote,
-                    location=location,
-                    distance=distance,
+                    location=loc.get("location"),
+                    distance=loc.get("distance", 50),
                 )
+            prepare_jobs(jobs)
+
+            # Validate remote jobs for this location
+            if is_remote:
+                jobs = validate_remote_jobs(jobs)
+
+            # Tag jobs with location source
+            for job in jobs:
+                job["_location_name"] = loc_name
+            return jobs
+
+        async def _scrape_usajobs_one(loc: dict) -> list[dict]:
+            """Query USAJOBS for one location (not gated by the JobSpy semaphore)."""
+            usajobs = await cached_scrape(
+                scrape_usajobs,
+                search_term=search_term,
+                hours_old=hours_old,
+                results_wanted=results_wanted,
+                is_remote=loc.get("is_remote", False),
+                location=loc.get("location"),
+                distance=loc.get("distance", 50),
+            )
+            for job in prepare_jobs(usajobs):
+                job["_location_name"] = f"{loc.get('name', 'unknown')}_usajobs"
+            return usajobs
+
+        # USAJOBS ignores location for remote searches, so locations that map to
+        # the same API query share one request, tagged with the first location
+        usajobs_queries: dict[tuple, dict] = {}
+        if usajobs_enabled:
+            for loc in locations:
+                params = usajobs_search_params(
+                    search_term,
+                    hours_old,
+                    results_wanted,
+                    loc.get("is_remote", False),
+                    loc.get("location"),
+                    loc.get("distance", 50),
+                )
+                usajobs_queries.setdefault(tuple(params.items()), loc)
+
+        locations_searched = [loc.get("name", "unknown") for loc in locations]
+        usajobs_locations = list(usajobs_queries.values())
+        results = await asyncio.gather(
+            *[_scrape_one(loc) for loc in locations],
+            *[_scrape_usajobs_one(loc) for loc in usajobs_locations],
+            return_exceptions=True,
+        )
 
-                # Validate remote jobs for this location
-                if is_remote:
-                    jobs = validate_remote_jobs(jobs)
-
-                # Tag jobs with location source
-                for job in jobs:
-                    job["_location_name"] = loc_name
-
-                all_jobs.extend(jobs)
-            except Exception as e:
-                print(f"Error searching {loc_name}: {e}")
+        # Results come back in order: JobSpy per location, then USAJOBS per query
+        all_jobs = []
+        sources = locations_searched + [
+            f"USAJOBS for {loc.get('name', 'unknown')}" for loc in usajobs_locations
+        ]
+        for source, result in zip(sources, results):
+            if isinstance(result, BaseException):
+                print(f"Error searching {source}: {result}")
                 continue
+            all_jobs.extend(result)
 
-        # Add USAJOBS results if enabled
-        if CONFIG.get("usajobs_enabled") and CONFIG.get("usajobs_api_key"):
-            for loc in locations:
-                loc_name = loc.get("name", "unknown")
-                is_remote = loc.get("is_remote", False)
-                location = loc.get("location")
-                distance = loc.get("distance", 50)
-
-                try:
-                    usajobs = scrape_usajobs(
-                        search_term=search_term,
-                        hours_old=hours_old,
-                        results_wanted=CONFIG.get("results_wanted", 50),
-                        is_remote=is_remote,
-                        location=location,
-                        distance=distance,
-                    )
-                    for job in usajobs:
-                        job["_location_name"] = f"{loc_name}_usajobs"
-                    all_jobs.extend(usajobs)
-                except Exception as e:
-                    print(f"Error searching USAJOBS for {loc_name}: {e}")
-
-        # Deduplicate across locations
-        all_jobs = dedupe_jobs(all_jobs)
-
-        # Filter excluded keywords
+        # Deduplicate across locations, filter excluded keywords, clean values
         exclude_list = list(request.excludeKeywords or []) + CONFIG.get("exclude_keywords", [])
-        all_jobs = filter_jobs(all_jobs, exclude_list)
+        all_jobs = finalize_jobs(all_jobs, exclude_list)
 
         # AND mode filtering
         if request.requireAllKeywords and request.keywords:
@@ -655,21 +924,20 @@ async def search_all(request: JobRequest):
             all_jobs = [
                 job for job in all_jobs
                 if all(
-                    kw in str(job.get("title", "")).lower() or
-                    kw in str(job.get("description", "")).lower()
+                    kw in job["_title_lc"] or kw in job["_desc_lc"]
                     for kw in keywords_lower
                 )
             ]
 
-        # Score and sort by include_keywords
+        # Score and keep the top results
         include_list = CONFIG.get("include_keywords", [])
-        all_jobs = score_jobs(all_jobs, include_list)
+        all_jobs = score_jobs(all_jobs, include_list, request.limit)
 
         all_jobs = clean_job_data(all_jobs)
 
         return JobResponse(
             error=False,
-            jobs=all_jobs[:request.limit],
+            jobs=all_jobs,
             locations_searched=locations_searched,
         )
 